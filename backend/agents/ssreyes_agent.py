@@ -3,11 +3,17 @@
 """
 Agente específico para San Sebastián de los Reyes - Versión mejorada sin duplicados
 """
+import asyncio
+import hashlib
+import logging
 import os
 import sys
+import threading
 import yaml
-import gc  # ✅ LÍNEA AÑADIDA 1/3
+from collections import OrderedDict
 from datetime import datetime, date
+from functools import lru_cache
+from types import MappingProxyType
 from typing import Dict, List
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
@@ -15,9 +21,7 @@ from langchain_anthropic import ChatAnthropic
 from langchain_core.output_parsers import JsonOutputParser
 from langchain_core.prompts import PromptTemplate
 from langchain_openai import ChatOpenAI
-from docling.document_converter import DocumentConverter
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
 
 from core import get_settings
 from core.database import SessionLocal
@@ -28,6 +32,65 @@ from core.models import Evento, FuenteWeb
 from services.event_normalizer import EventNormalizer
 
 settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Mapeo fijo de campos del LLM -> modelo base (no cambia entre ejecuciones)
+SSREYES_MAPEO_CAMPOS = MappingProxyType({
+    "titulo": "titulo",
+    "fecha_inicio": "fecha_inicio",
+    "categoria": "categoria",
+    "precio": "precio",
+    "ubicacion": "ubicacion",
+    "descripcion": "descripcion"
+})
+
+
+# Docling carga sus modelos al crear el conversor: uno compartido por proceso
+_converter_lock = threading.Lock()
+
+# Markdown ya convertido por hash SHA-256 del fichero (reintentos del mismo PDF)
+MARKDOWN_CACHE_MAX = 32
+_markdown_cache: "OrderedDict[str, str]" = OrderedDict()
+_markdown_cache_lock = threading.Lock()
+
+
+@lru_cache(maxsize=2)
+def get_document_converter(do_ocr: bool = True):
+    """DocumentConverter compartido entre agentes (import perezoso de docling)"""
+    from docling.datamodel.base_models import InputFormat
+    from docling.datamodel.pipeline_options import (PdfPipelineOptions,
+                                                    TableFormerMode)
+    from docling.document_converter import DocumentConverter, PdfFormatOption
+
+    pipeline_options = PdfPipelineOptions(do_ocr=do_ocr)
+    pipeline_options.table_structure_options.mode = TableFormerMode(settings.pdf_table_mode)
+    logger.debug(
+        "🔧 [SSReyes] DocumentConverter inicializado (OCR=%s, tablas=%s)",
+        do_ocr, settings.pdf_table_mode
+    )
+    return DocumentConverter(
+        format_options={InputFormat.PDF: PdfFormatOption(pipeline_options=pipeline_options)}
+    )
+
+
+# Mínimo de caracteres en la muestra para considerar el PDF nativo (sin OCR):
+# un escaneo puede traer solo número de página, cabecera o sello del escáner
+PDF_TEXTO_MINIMO = 50
+
+
+def pdf_tiene_texto(pdf_path: str, paginas: int = 2) -> bool:
+    """Comprobar si las primeras páginas del PDF ya traen capa de texto"""
+    try:
+        import fitz  # PyMuPDF
+
+        with fitz.open(pdf_path) as doc:
+            muestra = "".join(
+                doc[i].get_text() for i in range(min(paginas, doc.page_count))
+            )
+        return len(muestra.strip()) >= PDF_TEXTO_MINIMO
+    except Exception as e:
+        logger.warning("⚠️ [SSReyes] No se pudo inspeccionar %s: %s", pdf_path, e)
+        return False
 
 
 class SSReyesAgent:
@@ -62,14 +125,14 @@ class SSReyesAgent:
         # INICIALIZAR NORMALIZADOR
         self.normalizer = EventNormalizer()
 
-        # ✅ NUEVO: Inicializar DocumentConverter UNA SOLA VEZ
-        self.converter = None  # Lazy loading para evitar import issues
-        
         # Create prompt template
         self.extraction_prompt = PromptTemplate(
             input_variables=["texto"],
             template=self.config["prompts"]["extraction_prompt"],
         )
+
+        # Cadena LLM compuesta una sola vez por agente
+        self.extraction_chain = self.extraction_prompt | self.llm | self.json_parser
     
 
     def _load_fuente_info(self):
@@ -92,8 +155,10 @@ class SSReyesAgent:
             db.close()
 
 
-    def _load_ssreyes_config(self) -> Dict:
-        """Load SSReyes specific configuration from YAML"""
+    @staticmethod
+    @lru_cache()
+    def _load_ssreyes_config() -> Dict:
+        """Load SSReyes specific configuration from YAML (read once per process)"""
         try:
             config_path = os.path.join(
                 os.path.dirname(__file__), "prompts", "ssreyes.yaml"
@@ -116,20 +181,12 @@ class SSReyesAgent:
             else:
                 pdf_absolute_path = pdf_url
             
-            # Step 2: Extract PDF content
-            if self.converter is None:
-                from docling.document_converter import DocumentConverter
-                self.converter = DocumentConverter()
-                if os.getenv('DEBUG', 'false').lower() == 'true':
-                    print(f"🔧 [SSReyes] DocumentConverter inicializado")
-
-            result = self.converter.convert(pdf_absolute_path)
-            texto = result.document.export_to_markdown()
+            # Step 2: Extract PDF content (bloqueante: fuera del event loop)
+            texto = await asyncio.to_thread(self._convert_pdf_to_markdown, pdf_absolute_path)
         
             
             # Step 2: Extract events using LLM with SSReyes specific prompt
-            chain = self.extraction_prompt | self.llm | self.json_parser
-            response = await chain.ainvoke({"texto": texto})
+            response = await self.extraction_chain.ainvoke({"texto": texto})
 
             
             # Step 3: Process and validate response
@@ -137,27 +194,26 @@ class SSReyesAgent:
                 eventos_raw = response["eventos"]
                 
                 # Step 4: NORMALIZAR EVENTOS (incluye detección de duplicados)
-                mapeo_campos = {
-                    "titulo": "titulo",
-                    "fecha_inicio": "fecha_inicio",
-                    "categoria": "categoria",
-                    "precio": "precio",
-                    "ubicacion": "ubicacion",
-                    "descripcion": "descripcion"
-                }
-                
-                eventos_normalizados = self.normalizer.batch_normalize(eventos_raw, mapeo_campos)
+                eventos_normalizados = self.normalizer.batch_normalize(eventos_raw, SSREYES_MAPEO_CAMPOS)
     
                 
                 # Step 5: Save events to database WITH DEDUPLICATION
-                save_result = self.save_eventos_to_db_deduped(eventos_normalizados, pdf_url)
+                save_result = await asyncio.to_thread(
+                    self.save_eventos_to_db_deduped, eventos_normalizados, pdf_url
+                )
 
                 
+                # Un único timestamp para toda la extracción
+                ahora = datetime.now().isoformat()
+                metadata_comun = {
+                    "fuente_nombre": "San Sebastián de los Reyes",
+                    "url_original": pdf_url,
+                    "fecha_extraccion": ahora,
+                }
+
                 # Add metadata to each event
                 for evento in eventos_normalizados:
-                    evento["fuente_nombre"] = "San Sebastián de los Reyes"
-                    evento["url_original"] = pdf_url
-                    evento["fecha_extraccion"] = datetime.now().isoformat()
+                    evento.update(metadata_comun)
                     
                     # Ensure enlace_ubicacion is properly formatted
                     if not evento.get("enlace_ubicacion"):
@@ -175,10 +231,10 @@ class SSReyesAgent:
                     "eventos": eventos_normalizados,
                     "fuente": "SSReyes",
                     "pdf_url": pdf_url,
-                    "timestamp": datetime.now().isoformat()
+                    "timestamp": ahora
                 }
             else:
-                print(f"❌ [SSReyes] Invalid response format: {response}")
+                logger.error("❌ [SSReyes] Invalid response format: %s", response)
                 return {
                     "estado": "error",
                     "error": "Invalid response format from LLM",
@@ -187,7 +243,7 @@ class SSReyesAgent:
                 }
                 
         except Exception as e:
-            print(f"💥 [SSReyes] Error during extraction: {str(e)}")
+            logger.exception("💥 [SSReyes] Error during extraction: %s", e)
             return {
                 "estado": "error",
                 "error": str(e),
@@ -196,6 +252,35 @@ class SSReyesAgent:
             }
 
 
+    def _convert_pdf_to_markdown(self, pdf_path: str) -> str:
+        """Convertir el PDF a markdown con Docling (llamada síncrona)"""
+        # Cada subida tiene un nombre único: la clave es el contenido del fichero
+        with open(pdf_path, "rb") as f:
+            digest = hashlib.file_digest(f, "sha256").hexdigest()
+
+        # La caché tiene su propio lock: un acierto no espera a otra conversión
+        with _markdown_cache_lock:
+            texto = _markdown_cache.get(digest)
+            if texto is not None:
+                _markdown_cache.move_to_end(digest)
+        if texto is not None:
+            logger.debug("🔧 [SSReyes] Markdown recuperado de caché: %s", pdf_path)
+            return texto
+
+        # El OCR es la fase más cara: solo para PDFs escaneados o imágenes
+        do_ocr = not (pdf_path.lower().endswith(".pdf") and pdf_tiene_texto(pdf_path))
+        converter = get_document_converter(do_ocr)
+        with _converter_lock:
+            result = converter.convert(pdf_path)
+        texto = result.document.export_to_markdown()
+
+        with _markdown_cache_lock:
+            _markdown_cache[digest] = texto
+            if len(_markdown_cache) > MARKDOWN_CACHE_MAX:
+                _markdown_cache.popitem(last=False)
+
+        return texto
+
     def save_eventos_to_db_deduped(self, eventos: List[Dict], pdf_url: str) -> Dict:
         """
         Save events to database WITH DUPLICATE DETECTION
@@ -205,38 +290,46 @@ class SSReyesAgent:
         db = SessionLocal()
         
         try:
+            # Precargar en dos consultas los hashes y claves de contenido ya
+            # guardados, en lugar de dos SELECT por evento
+            hashes = {e["hash_contenido"] for e in eventos if e.get("hash_contenido")}
+            hashes_existentes = {
+                h for (h,) in db.query(Evento.hash_contenido).filter(
+                    Evento.hash_contenido.in_(hashes)
+                )
+            } if hashes else set()
+
+            titulos = {e["titulo"] for e in eventos}
+            contenido_existente = {
+                tuple(fila) for fila in db.query(
+                    Evento.titulo, Evento.fecha_inicio, Evento.ubicacion
+                ).filter(Evento.titulo.in_(titulos))
+            } if titulos else set()
+
             for evento_data in eventos:
                 # Verificar si ya existe un evento con el mismo hash
                 hash_contenido = evento_data.get('hash_contenido')
                 
-                if hash_contenido:
-                    existing_evento = db.query(Evento).filter(
-                        Evento.hash_contenido == hash_contenido
-                    ).first()
-                    
-                    if existing_evento:
-                        print(f"⚠️ [SSReyes] Duplicate detected: {evento_data['titulo']}")
-                        duplicate_count += 1
-                        continue
+                if hash_contenido and hash_contenido in hashes_existentes:
+                    logger.info("⚠️ [SSReyes] Duplicate detected: %s", evento_data['titulo'])
+                    duplicate_count += 1
+                    continue
                 
                 # También verificar por título + fecha + ubicación como backup
-                existing_by_content = db.query(Evento).filter(
-                    and_(
-                        Evento.titulo == evento_data["titulo"],
-                        Evento.fecha_inicio == datetime.combine(evento_data["fecha_inicio"], datetime.min.time()),
-                        Evento.ubicacion == evento_data.get("ubicacion", "")
-                    )
-                ).first()
+                fecha_inicio = datetime.combine(evento_data["fecha_inicio"], datetime.min.time())
+                clave_contenido = (
+                    evento_data["titulo"], fecha_inicio, evento_data.get("ubicacion", "")
+                )
                 
-                if existing_by_content:
-                    print(f"⚠️ [SSReyes] Content duplicate detected: {evento_data['titulo']}")
+                if clave_contenido in contenido_existente:
+                    logger.info("⚠️ [SSReyes] Content duplicate detected: %s", evento_data['titulo'])
                     duplicate_count += 1
                     continue
                 
                 # Crear objeto Evento
                 evento = Evento(
                     titulo=evento_data["titulo"],
-                    fecha_inicio=datetime.combine(evento_data["fecha_inicio"], datetime.min.time()),
+                    fecha_inicio=fecha_inicio,
                     categoria=evento_data["categoria"],
                     precio=evento_data["precio"],
                     ubicacion=evento_data.get("ubicacion"),
@@ -250,10 +343,19 @@ class SSReyesAgent:
                 )
                 db.add(evento)
                 saved_count += 1
-                print(f"✅ [SSReyes] Added new event: {evento_data['titulo']}")
+
+                # Registrar también los duplicados dentro del mismo lote
+                if hash_contenido:
+                    hashes_existentes.add(hash_contenido)
+                contenido_existente.add((evento.titulo, fecha_inicio, evento.ubicacion))
+
+                logger.debug("✅ [SSReyes] Added new event: %s", evento_data['titulo'])
             
             db.commit()
-            print(f"✅ [SSReyes] Successfully saved {saved_count} events, skipped {duplicate_count} duplicates")
+            logger.info(
+                "✅ [SSReyes] Successfully saved %d events, skipped %d duplicates",
+                saved_count, duplicate_count
+            )
             return {
                 "guardados": saved_count,
                 "duplicados": duplicate_count
@@ -261,7 +363,7 @@ class SSReyesAgent:
             
         except Exception as e:
             db.rollback()
-            print(f"❌ [SSReyes] Error saving to database: {str(e)}")
+            logger.exception("❌ [SSReyes] Error saving to database: %s", e)
             raise e
         finally:
             db.close()
@@ -271,17 +373,19 @@ class SSReyesAgent:
         MÉTODO LEGACY - Usar save_eventos_to_db_deduped en su lugar
         Mantenerlo para compatibilidad hacia atrás
         """
-        print("⚠️ [SSReyes] Using legacy save method, consider upgrading to deduped version")
+        logger.warning("⚠️ [SSReyes] Using legacy save method, consider upgrading to deduped version")
         return self.save_eventos_to_db_deduped(eventos, pdf_url)
 
     def get_config_info(self) -> Dict:
         """Get configuration info for debugging"""
+        source_info = self.config["source_info"]
+        extraction_config = self.config["extraction_config"]
         return {
-            "source_name": self.config["source_info"]["name"],
-            "domain": self.config["source_info"]["domain"],
-            "type": self.config["source_info"]["type"],
-            "default_location": self.config["extraction_config"]["default_location"],
-            "default_price": self.config["extraction_config"]["default_price"],
+            "source_name": source_info["name"],
+            "domain": source_info["domain"],
+            "type": source_info["type"],
+            "default_location": extraction_config["default_location"],
+            "default_price": extraction_config["default_price"],
             "normalizer_enabled": True,  # Nueva información
             "deduplication_enabled": True
         }
@@ -301,19 +405,18 @@ class SSReyesAgent:
             for evento in eventos:
                 # Generar hash si no lo tiene
                 if not evento.hash_contenido:
-                    key_content = f"{evento.titulo}{evento.fecha_inicio}{evento.ubicacion or ''}"
                     evento.hash_contenido = self.normalizer._generate_hash({"titulo": evento.titulo, "fecha_inicio": str(evento.fecha_inicio), "ubicacion": evento.ubicacion})
                     
                 # Si ya vimos este hash, eliminar el duplicado
                 if evento.hash_contenido in seen_hashes:
                     db.delete(evento)
                     duplicates_removed += 1
-                    print(f"🗑️ [SSReyes] Removed duplicate: {evento.titulo}")
+                    logger.debug("🗑️ [SSReyes] Removed duplicate: %s", evento.titulo)
                 else:
                     seen_hashes.add(evento.hash_contenido)
             
             db.commit()
-            print(f"🧹 [SSReyes] Cleanup completed: removed {duplicates_removed} duplicates")
+            logger.info("🧹 [SSReyes] Cleanup completed: removed %d duplicates", duplicates_removed)
             
             return {
                 "duplicates_removed": duplicates_removed,
@@ -322,16 +425,7 @@ class SSReyesAgent:
             
         except Exception as e:
             db.rollback()
-            print(f"❌ [SSReyes] Error during cleanup: {str(e)}")
+            logger.exception("❌ [SSReyes] Error during cleanup: %s", e)
             raise e
         finally:
             db.close()
-
-    def __del__(self):
-        """✅ LÍNEA AÑADIDA 3/3 - Cleanup al destruir objeto"""
-        try:
-            if hasattr(self, 'llm'):
-                del self.llm
-            gc.collect()
-        except:
-            pass
\ No newline at end of file
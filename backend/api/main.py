@@ -3,8 +3,12 @@
 """
 Servidor FastAPI simplificado para Eventos Mayores Madrid
 """
+import logging
+import queue
 import sys
 import os
+from contextlib import asynccontextmanager
+from logging.handlers import QueueHandler, QueueListener
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
 from fastapi import FastAPI
@@ -15,6 +19,28 @@ from core import get_settings, create_tables
 # Configuración
 settings = get_settings()
 
+# Logging no bloqueante: los handlers escriben desde un hilo aparte
+log_queue = queue.SimpleQueue()
+log_handler = logging.StreamHandler()
+log_handler.setFormatter(
+    logging.Formatter("%(asctime)s %(levelname)s [%(name)s] %(message)s")
+)
+log_listener = QueueListener(log_queue, log_handler)
+logging.basicConfig(level=logging.INFO, handlers=[QueueHandler(log_queue)])
+# DEBUG solo para los módulos propios, no para httpx, docling, etc.
+if settings.debug:
+    for nombre in ("agents", "api", "services", "backend"):
+        logging.getLogger(nombre).setLevel(logging.DEBUG)
+log_listener.start()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Vaciar la cola de logs al apagar"""
+    yield
+    log_listener.stop()
+
+
 # Crear aplicación FastAPI
 app = FastAPI(
     title="Eventos Mayores Madrid API",
@@ -22,6 +48,7 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    lifespan=lifespan,
 )
 
 # CORS para frontend
@@ -8,18 +8,23 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, load_only
 from datetime import datetime
 from core import get_db
 from core.models import FuenteWeb, Evento
 from agents.ssreyes_agent import SSReyesAgent
 from fastapi import UploadFile, File, Form
+import logging
 import shutil
 import os
 
 
+logger = logging.getLogger(__name__)
 router = APIRouter()
 
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # 1 MiB
+
 @router.post("/ssreyes/extract")
 async def extract_ssreyes_events(request: dict):
     """
@@ -70,7 +75,20 @@ async def get_ssreyes_config():
 @router.get("/fuentes")
 def get_fuentes(db: Session = Depends(get_db)):
     """Obtener todos los agentes configurados"""
-    fuentes = db.query(FuenteWeb).all()
+    # Solo las columnas que se devuelven: evita cargar los JSON de configuración
+    fuentes = db.query(FuenteWeb).options(
+        load_only(
+            FuenteWeb.id,
+            FuenteWeb.nombre,
+            FuenteWeb.url,
+            FuenteWeb.tipo,
+            FuenteWeb.activa,
+            FuenteWeb.frecuencia_actualizacion,
+            FuenteWeb.ultima_ejecucion,
+            FuenteWeb.ultimo_estado,
+            FuenteWeb.eventos_encontrados_ultima_ejecucion,
+        )
+    ).all()
     return [
         {
             "id": f.id,
@@ -103,7 +121,15 @@ def create_fuente(request: dict, db: Session = Depends(get_db)):
         db.refresh(fuente)
         
         return {"id": fuente.id, "message": "Agente creado exitosamente"}
-        
+
+    except IntegrityError as e:
+        # El índice único de `nombre` resuelve el duplicado en el propio INSERT;
+        # el resto (p. ej. NOT NULL) son datos inválidos, no duplicados
+        db.rollback()
+        error = str(e.orig).lower()
+        if ("unique" in error or "duplicate" in error) and "nombre" in error:
+            raise HTTPException(status_code=409, detail="Ya existe un agente con ese nombre")
+        raise HTTPException(status_code=400, detail=f"Datos del agente no válidos: {e.orig}")
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
@@ -140,9 +166,10 @@ async def upload_file(
         unique_filename = f"{timestamp}_{agent_type}_{file.filename}"
         file_path = os.path.join(upload_dir, unique_filename)
         
+        # Copiar por bloques: el fichero nunca se carga entero en memoria
         with open(file_path, "wb") as buffer:
-            content = await file.read()
-            buffer.write(content)
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                buffer.write(chunk)
         
         # Devolver la ruta relativa para que el frontend la use
         relative_path = os.path.join("data", "uploads", unique_filename)
@@ -169,10 +196,12 @@ def get_uploaded_files(agent_name: str):
         if not os.path.exists(upload_dir):
             return []
 
-        # Filtrar archivos que pertenecen al agente
+        # Filtrar archivos que pertenecen al agente (prefijos calculados una vez)
+        prefijo_sin_fecha = f"_{agent_name}_"
+        prefijo_agente = f"{agent_name}_"
         files = [
-            f for f in os.listdir(upload_dir) 
-            if f.startswith(f"_{agent_name}_") or f.split('_', 1)[1].startswith(f"{agent_name}_")
+            f for f in os.listdir(upload_dir)
+            if f.startswith(prefijo_sin_fecha) or f.partition('_')[2].startswith(prefijo_agente)
         ]
         
         return sorted(files, reverse=True)
@@ -219,13 +248,13 @@ async def delete_uploaded_file(filename: str):
 def delete_fuente(fuente_id: int, db: Session = Depends(get_db)):
     """Eliminar una fuente por ID CON CASCADA"""
     try:
-        # Verificar que la fuente existe
-        fuente = db.query(FuenteWeb).filter(FuenteWeb.id == fuente_id).first()
-        if not fuente:
+        # Verificar que la fuente existe (solo necesitamos su nombre)
+        fuente_nombre = db.query(FuenteWeb.nombre).filter(FuenteWeb.id == fuente_id).scalar()
+        if fuente_nombre is None:
             raise HTTPException(status_code=404, detail="Fuente no encontrada")
         
         # 1. Borrar eventos asociados
-        eventos_borrados = db.query(Evento).filter(Evento.fuente_nombre == fuente.nombre).delete()
+        eventos_borrados = db.query(Evento).filter(Evento.fuente_nombre == fuente_nombre).delete()
         
         # 2. Borrar archivos subidos
         backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -234,11 +263,12 @@ def delete_fuente(fuente_id: int, db: Session = Depends(get_db)):
         
         if os.path.exists(upload_dir):
             archivos_a_borrar = []
+            nombre_archivo = fuente_nombre.lower().replace(' ', '')
             # Primero identificar archivos a borrar
             for archivo in os.listdir(upload_dir):
                 try:
                     parts = archivo.split('_', 2)
-                    if len(parts) >= 2 and parts[1].lower() == fuente.nombre.lower().replace(' ', ''):
+                    if len(parts) >= 2 and parts[1].lower() == nombre_archivo:
                         archivos_a_borrar.append(archivo)
                 except Exception:
                     continue
@@ -249,10 +279,10 @@ def delete_fuente(fuente_id: int, db: Session = Depends(get_db)):
                     os.remove(os.path.join(upload_dir, archivo))
                     archivos_borrados += 1
                 except Exception as e:
-                    print(f"Error borrando {archivo}: {e}")
+                    logger.warning("Error borrando %s: %s", archivo, e)
         
-        # 3. Borrar fuente
-        db.delete(fuente)
+        # 3. Borrar fuente con un DELETE directo, sin cargar el objeto
+        db.query(FuenteWeb).filter(FuenteWeb.id == fuente_id).delete()
         db.commit()
         
         return {
@@ -276,16 +306,9 @@ async def cleanup_ssreyes_duplicates():
     try:
         agent = SSReyesAgent()
         result = agent.cleanup_duplicates()
-        
+
         return result
         
-        return {
-            "estado": "success",
-            "duplicates_removed": result['duplicates_removed'],
-            "total_events_processed": result['total_events_processed'],
-            "message": f"Se eliminaron {result['duplicates_removed']} eventos duplicados"
-        }
-        
     except Exception as e:
         return {
             "estado": "error",
@@ -356,27 +379,28 @@ def fix_missing_hashes(db: Session = Depends(get_db)):
     Generar hashes faltantes para eventos existentes
     """
     try:
-        from services.event_normalizer import EventNormalizer
         import hashlib
-        
-        normalizer = EventNormalizer()
-        
-        # Buscar eventos sin hash
-        eventos_sin_hash = db.query(Evento).filter(
+
+        # Buscar eventos sin hash (solo las columnas necesarias, sin JSON)
+        eventos_sin_hash = db.query(
+            Evento.id, Evento.titulo, Evento.fecha_inicio, Evento.ubicacion
+        ).filter(
             Evento.hash_contenido.is_(None)
         ).all()
-        
-        updated_count = 0
-        
-        for evento in eventos_sin_hash:
+
+        updates = []
+
+        for evento_id, titulo, fecha_inicio, ubicacion in eventos_sin_hash:
             # Generar hash
-            key_content = f"{evento.titulo}{evento.fecha_inicio}{evento.ubicacion or ''}"
+            key_content = f"{titulo}{fecha_inicio}{ubicacion or ''}"
             hash_contenido = hashlib.sha256(key_content.encode("utf-8")).hexdigest()
-            
-            evento.hash_contenido = hash_contenido
-            updated_count += 1
-        
+
+            updates.append({"id": evento_id, "hash_contenido": hash_contenido})
+
+        # Un único UPDATE por lotes en lugar de cargar y modificar cada objeto
+        db.bulk_update_mappings(Evento, updates)
         db.commit()
+        updated_count = len(updates)
         
         return {
             "estado": "success",
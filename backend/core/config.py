@@ -5,7 +5,7 @@ Configuración global del proyecto usando Pydantic Settings
 """
 import os
 from functools import lru_cache
-from typing import List
+from typing import List, Literal
 
 from pydantic import Field
 from pydantic_settings import BaseSettings
@@ -41,6 +41,9 @@ class Settings(BaseSettings):
     playwright_headless: bool = True
     playwright_timeout: int = 150000
 
+    # ============= DOCUMENTOS (DOCLING) =============
+    pdf_table_mode: Literal["accurate", "fast"] = "accurate"
+
     # ============= SCHEDULER =============
     scheduler_timezone: str = "Europe/Madrid"
     default_update_frequency: str = "0 9 * * 1"  # Lunes 9:00
@@ -6,6 +6,7 @@ Servicio para normalizar y validar eventos extraídos
 import hashlib
 import re
 from datetime import date, datetime
+from functools import lru_cache
 from typing import Any, Dict, List, Optional
 
 from sqlalchemy.orm import Session
@@ -14,6 +15,32 @@ from core import get_settings
 
 settings = get_settings()
 
+# Patrones precompilados (se usan una o varias veces por evento)
+ESPACIOS_RE = re.compile(r"\s+")
+HTML_TAG_RE = re.compile(r"<[^>]+>")
+PRECIO_NUMERO_RE = re.compile(r"(\d+(?:[,\.]\d{1,2})?)")
+FECHA_FORMA_RE = re.compile(r"^(\d{1,4})([\/\-\.])(\d{1,2})\2(\d{1,4})$")
+FECHA_NUMERICA_RE = re.compile(r"(\d{1,2})[\/\-\.](\d{1,2})[\/\-\.](\d{4})")
+FECHA_TEXTO_RE = re.compile(
+    r"(\d{1,2})\s+de\s+([a-záéíóú]+)\.?\s+(?:de\s+|del\s+)?(\d{4})", re.IGNORECASE
+)
+
+# Meses en español (nombre completo y abreviatura), independiente del locale
+MESES_ES = {
+    "enero": 1, "ene": 1,
+    "febrero": 2, "feb": 2,
+    "marzo": 3, "mar": 3,
+    "abril": 4, "abr": 4,
+    "mayo": 5, "may": 5,
+    "junio": 6, "jun": 6,
+    "julio": 7, "jul": 7,
+    "agosto": 8, "ago": 8,
+    "septiembre": 9, "setiembre": 9, "sep": 9, "sept": 9,
+    "octubre": 10, "oct": 10,
+    "noviembre": 11, "nov": 11,
+    "diciembre": 12, "dic": 12,
+}
+
 
 class EventNormalizer:
     """
@@ -30,6 +57,11 @@ class EventNormalizer:
         "Ocio y Social",
     ]
 
+    # Palabras que indican evento gratuito
+    PALABRAS_GRATIS = frozenset(
+        ("gratis", "gratuito", "libre", "sin coste", "entrada libre", "free")
+    )
+
     # Mapeo de palabras clave a categorías
     CATEGORIA_KEYWORDS = {
         "Cultura": [
@@ -89,6 +121,17 @@ class EventNormalizer:
         ],
     }
 
+    PATRON_GRATIS = re.compile(
+        "|".join(map(re.escape, sorted(PALABRAS_GRATIS))), re.IGNORECASE
+    )
+
+    # Una alternancia precompilada por categoría, en el mismo orden de prioridad
+    # (IGNORECASE evita crear una copia en minúsculas del texto de cada evento)
+    CATEGORIA_PATRONES = tuple(
+        (categoria, re.compile("|".join(map(re.escape, keywords)), re.IGNORECASE))
+        for categoria, keywords in CATEGORIA_KEYWORDS.items()
+    )
+
     def normalize_event(self, evento_raw: Dict, mapeo_campos: Dict) -> Optional[Dict]:
         """
         Normalizar un evento individual desde datos raw
@@ -97,6 +140,10 @@ class EventNormalizer:
             # Aplicar mapeo básico de campos
             evento_normalizado = self._apply_field_mapping(evento_raw, mapeo_campos)
 
+            # Descartar antes de normalizar si faltan los campos obligatorios
+            if not evento_normalizado.get("titulo") or not evento_normalizado.get("fecha_inicio"):
+                return None
+
             # Normalizar campos específicos
             evento_normalizado = self._normalize_fields(evento_normalizado)
 
@@ -185,7 +232,7 @@ class EventNormalizer:
             return ""
 
         # Limpiar espacios múltiples
-        titulo = re.sub(r"\s+", " ", titulo.strip())
+        titulo = ESPACIOS_RE.sub(" ", titulo.strip())
 
         # Capitalizar primera letra de cada palabra importante
         titulo = titulo.title()
@@ -203,22 +250,12 @@ class EventNormalizer:
         if not precio:
             return "Gratis"
 
-        precio_lower = precio.lower().strip()
-
-        # Detectar gratuito
-        free_words = [
-            "gratis",
-            "gratuito",
-            "libre",
-            "sin coste",
-            "entrada libre",
-            "free",
-        ]
-        if any(word in precio_lower for word in free_words):
+        # Detectar gratuito (una sola búsqueda, sin copia en minúsculas)
+        if self.PATRON_GRATIS.search(precio):
             return "Gratis"
 
         # Extraer número y euro
-        numbers = re.findall(r"(\d+(?:[,\.]\d{1,2})?)", precio)
+        numbers = PRECIO_NUMERO_RE.findall(precio)
         if numbers:
             price_num = numbers[0].replace(",", ".")
             return f"{price_num}€"
@@ -236,13 +273,11 @@ class EventNormalizer:
             return categoria_actual
 
         # Inferir categoría desde título y descripción
-        texto_evento = (
-            f"{evento.get('titulo', '')} {evento.get('descripcion', '')}".lower()
-        )
+        texto_evento = f"{evento.get('titulo', '')} {evento.get('descripcion', '')}"
 
-        # Buscar palabras clave por categoría
-        for categoria, keywords in self.CATEGORIA_KEYWORDS.items():
-            if any(keyword in texto_evento for keyword in keywords):
+        # Buscar palabras clave por categoría (una pasada por categoría)
+        for categoria, patron in self.CATEGORIA_PATRONES:
+            if patron.search(texto_evento):
                 return categoria
 
         # Categoría por defecto
@@ -259,17 +294,48 @@ class EventNormalizer:
         if isinstance(fecha, (date, datetime)):
             return fecha.date() if isinstance(fecha, datetime) else fecha
 
-        # Si es string, intentar parsear
+        # Si es string, intentar parsear (clave de caché ya normalizada)
         if isinstance(fecha, str):
-            return self._parse_date_string(fecha)
+            return self._parse_date_string(fecha.strip())
 
         return None
 
-    def _parse_date_string(self, fecha_str: str) -> Optional[date]:
+    @staticmethod
+    @lru_cache(maxsize=4096)
+    def _parse_date_string(fecha_str: str) -> Optional[date]:
         """
-        Parsear fecha desde string con múltiples formatos
+        Parsear fecha desde string con múltiples formatos (memoizado: los
+        eventos de un mismo PDF repiten muchas fechas)
         """
-        fecha_str = fecha_str.strip()
+        # Camino rápido: fechas numéricas con separador homogéneo, resueltas
+        # por su forma sin pasar por la cascada de strptime/ValueError
+        forma = FECHA_FORMA_RE.match(fecha_str)
+        if forma:
+            a, separador, b, c = forma.groups()
+            try:
+                if len(a) == 4 and len(c) <= 2 and separador != ".":
+                    return date(int(a), int(b), int(c))
+                if len(a) <= 2 and len(c) == 4:
+                    return date(int(c), int(b), int(a))
+                if len(a) <= 2 and len(c) == 2:
+                    # Mismo pivote que strptime("%y"): 69-99 -> 19xx
+                    year = int(c)
+                    year += 1900 if year >= 69 else 2000
+                    return date(year, int(b), int(a))
+            except ValueError:
+                return None
+
+        # Fechas con el mes en texto ("15 de noviembre de 2024"); strptime("%B")
+        # depende del locale del proceso y no reconoce los meses en español
+        texto = FECHA_TEXTO_RE.fullmatch(fecha_str)
+        if texto:
+            dia, nombre_mes, anio = texto.groups()
+            mes = MESES_ES.get(nombre_mes.lower())
+            if mes:
+                try:
+                    return date(int(anio), mes, int(dia))
+                except ValueError:
+                    return None
 
         # Formatos comunes
         formatos = [
@@ -292,7 +358,7 @@ class EventNormalizer:
                 continue
 
         # Intentar extraer fecha con regex
-        date_match = re.search(r"(\d{1,2})[\/\-\.](\d{1,2})[\/\-\.](\d{4})", fecha_str)
+        date_match = FECHA_NUMERICA_RE.search(fecha_str)
         if date_match:
             try:
                 day, month, year = date_match.groups()
@@ -327,10 +393,10 @@ class EventNormalizer:
             return ""
 
         # Limpiar HTML tags si los hay
-        descripcion = re.sub(r"<[^>]+>", "", descripcion)
+        descripcion = HTML_TAG_RE.sub("", descripcion)
 
         # Limpiar espacios múltiples
-        descripcion = re.sub(r"\s+", " ", descripcion.strip())
+        descripcion = ESPACIOS_RE.sub(" ", descripcion.strip())
 
         # Limitar longitud
         if len(descripcion) > 1000:
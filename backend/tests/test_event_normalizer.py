@@ -0,0 +1,57 @@
+# backend/tests/test_event_normalizer.py
+
+"""
+Tests del parseo de fechas de EventNormalizer
+"""
+import os
+import sys
+from datetime import date
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+# Valores mínimos para que Settings cargue sin .env (no se usan en estos tests)
+os.environ.setdefault("SECRET_KEY", "x" * 32)
+os.environ.setdefault("ADMIN_PASSWORD", "test-admin")
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+
+import pytest
+
+from services.event_normalizer import EventNormalizer
+
+
+@pytest.mark.parametrize(
+    "fecha_str, esperado",
+    [
+        ("15 de noviembre de 2024", date(2024, 11, 15)),
+        ("1 de mayo del 2025", date(2025, 5, 1)),
+        ("3 de sept. 2024", date(2024, 9, 3)),
+        ("7 de Enero de 2025", date(2025, 1, 7)),
+        ("20 de setiembre de 2024", date(2024, 9, 20)),
+    ],
+)
+def test_meses_en_espanol(fecha_str, esperado):
+    assert EventNormalizer._parse_date_string(fecha_str) == esperado
+
+
+@pytest.mark.parametrize(
+    "fecha_str",
+    [
+        "31 de febrero de 2024",  # día inexistente
+        "15 de brumario de 2024",  # mes desconocido
+    ],
+)
+def test_meses_en_espanol_invalidos(fecha_str):
+    assert EventNormalizer._parse_date_string(fecha_str) is None
+
+
+@pytest.mark.parametrize(
+    "fecha_str, esperado",
+    [
+        ("15/11/2024", date(2024, 11, 15)),
+        ("2024-11-15", date(2024, 11, 15)),
+        ("15 de November de 2024", date(2024, 11, 15)),  # locale C
+    ],
+)
+def test_formatos_existentes_sin_cambios(fecha_str, esperado):
+    assert EventNormalizer._parse_date_string(fecha_str) == esperado